@@ -27,6 +27,10 @@ class RecordingService: NSObject, ObservableObject {
     private var recordingTimer: Timer?
     private var levelTimer: Timer?
     private var recordingStartTime: Date?
+    private var whisperDaemon: Process?
+    private var whisperDaemonReady: DispatchGroup?
+
+    private let pythonPath = "/Applications/Xcode.app/Contents/Developer/Library/Frameworks/Python3.framework/Versions/3.9/bin/python3.9"
 
     private let recordingsDirectory: URL = {
         let appSupport = FileManager.default.urls(for: .applicationSupportDirectory, in: .userDomainMask).first!
@@ -37,6 +41,12 @@ class RecordingService: NSObject, ObservableObject {
 
     private override init() {
         super.init()
+
+        // Start loading the Whisper model now so it is resident by the
+        // time a recording needs transcribing
+        if let scriptPath = getWhisperScriptPath() {
+            startWhisperDaemonIfNeeded(scriptPath: scriptPath)
+        }
     }
 
     // MARK: - Recording
@@ -165,21 +175,26 @@ class RecordingService: NSObject, ObservableObject {
             throw RecordingError.whisperNotAvailable
         }
 
+        // Keep a daemon around so later transcriptions skip loading the model,
+        // and hand it this file only once it has the model loaded
+        startWhisperDaemonIfNeeded(scriptPath: scriptPath)
+        if let ready = whisperDaemonReady {
+            await withCheckedContinuation { continuation in
+                ready.notify(queue: .global(qos: .utility)) {
+                    continuation.resume()
+                }
+            }
+        }
+
         let process = Process()
         let outputPipe = Pipe()
         let errorPipe = Pipe()
 
-        let pythonPath = "/Applications/Xcode.app/Contents/Developer/Library/Frameworks/Python3.framework/Versions/3.9/bin/python3.9"
-
         process.executableURL = URL(fileURLWithPath: pythonPath)
         process.arguments = [scriptPath, filePath]
         process.standardOutput = outputPipe
         process.standardError = errorPipe
-
-        var env = ProcessInfo.processInfo.environment
-        let userSitePackages = "/Users/\(NSUserName())/Library/Python/3.9/lib/python/site-packages"
-        env["PYTHONPATH"] = userSitePackages
-        process.environment = env
+        process.environment = pythonEnvironment()
 
         let startTime = Date()
 
@@ -227,6 +242,57 @@ class RecordingService: NSObject, ObservableObject {
         )
     }
 
+    private func pythonEnvironment() -> [String: String] {
+        var env = ProcessInfo.processInfo.environment
+        let userSitePackages = "/Users/\(NSUserName())/Library/Python/3.9/lib/python/site-packages"
+        env["PYTHONPATH"] = userSitePackages
+        return env
+    }
+
+    private func startWhisperDaemonIfNeeded(scriptPath: String) {
+        if let daemon = whisperDaemon, daemon.isRunning {
+            return
+        }
+
+        // The daemon serves the one-shot script over a local socket and
+        // exits when its stdin pipe closes with the app
+        let process = Process()
+        let outputPipe = Pipe()
+        process.executableURL = URL(fileURLWithPath: pythonPath)
+        process.arguments = [scriptPath, "--daemon"]
+        process.standardInput = Pipe()
+        process.standardOutput = outputPipe
+        process.standardError = FileHandle.nullDevice
+        process.environment = pythonEnvironment()
+
+        do {
+            try process.run()
+            whisperDaemon = process
+        } catch {
+            whisperDaemonReady = nil
+            print("Failed to start Whisper daemon: \(error.localizedDescription)")
+            return
+        }
+
+        // The daemon prints its ready line once the model is loaded; the
+        // group is left then, or when the daemon exits first
+        let ready = DispatchGroup()
+        ready.enter()
+        whisperDaemonReady = ready
+        let output = outputPipe.fileHandleForReading
+        DispatchQueue.global(qos: .utility).async {
+            var data = Data()
+            while !data.contains(UInt8(ascii: "\n")) {
+                let chunk = output.availableData
+                if chunk.isEmpty {
+                    break
+                }
+                data.append(chunk)
+            }
+            ready.leave()
+        }
+    }
+
     private func getWhisperScriptPath() -> String? {
         // Try bundle first
         if let bundlePath = Bundle.main.path(forResource: "whisper_transcribe", ofType: "py") {
@@ -4,15 +4,30 @@ AI Daemon for OneOnOne
 Persistent MLX model inference for meeting insights.
 """
 
+import os
 import sys
+import copy
 import json
+import time
 import signal
+import hashlib
+import sqlite3
+import itertools
+import selectors
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterator, Optional
 
 try:
     import mlx.core as mx
-    from mlx_lm import load, generate
+    import mlx.nn as nn
+    from mlx_lm import load, stream_generate
+    from mlx_lm.sample_utils import make_sampler, make_logits_processors
+    from mlx_lm.models.cache import (
+        make_prompt_cache,
+        can_trim_prompt_cache,
+        trim_prompt_cache
+    )
     MLX_AVAILABLE = True
 except ImportError as e:
     MLX_AVAILABLE = False
@@ -22,6 +37,226 @@ except ImportError as e:
     }), flush=True)
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from mlx_lm.generate import BatchGenerator
+except ImportError:
+    # Older mlx_lm: concurrent requests are interleaved instead of batched
+    BatchGenerator = None
+
+
+# Weight dtypes accepted by the load_model command
+MODEL_DTYPES = {
+    "float16": mx.float16,
+    "bfloat16": mx.bfloat16,
+    "float32": mx.float32
+}
+
+# Bit widths supported by MLX affine quantization
+QUANTIZE_BITS = (2, 3, 4, 6, 8)
+QUANTIZE_GROUP_SIZE = 64
+
+# Tokens the draft model proposes per speculative decoding step
+NUM_DRAFT_TOKENS = 4
+
+# Freed buffers MLX keeps around for reuse instead of returning to the OS
+MLX_CACHE_LIMIT_BYTES = 2 * 1024 ** 3
+
+# Prompt lengths run through the model at load time so their kernels are
+# built before the first request (2048 is mlx_lm's prefill chunk size)
+WARMUP_PROMPT_LENGTHS = (1, 128, 512, 2048)
+
+# Longest token history kept in the reusable prompt cache
+PROMPT_CACHE_MAX_TOKENS = 8192
+
+# Model tokens coalesced into each streamed token message
+TOKENS_PER_EVENT = 4
+
+# Finished generations, reused when the same request is made again. Off
+# unless AI_RESULT_CACHE names the SQLite file, which should live with the
+# rest of the app's data so it is removed along with it.
+RESULT_CACHE_PATH = os.environ.get("AI_RESULT_CACHE")
+RESULT_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+# Cached text is replayed in pieces of roughly 4 tokens, which step()
+# coalesces like generated tokens
+CACHED_CHARS_PER_EVENT = 16
+
+
+def dumps(obj) -> bytes:
+    """Encode obj as compact JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def loads(data: bytes):
+    """Decode JSON bytes, using orjson when available.
+
+    Both decoders raise json.JSONDecodeError subclasses on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Token messages dominate output volume, so they skip dict construction
+TOKEN_RECORD = b'{"type":"token","req_id":%b,"token":%b}\n'
+
+
+class StdoutWriter:
+    """Line-delimited JSON writer that coalesces streamed tokens.
+
+    Token messages are buffered and written once the buffer reaches
+    FLUSH_BYTES or has been pending for FLUSH_INTERVAL seconds; the
+    daemon loop calls flush_if_due() between decode steps so a quiet
+    stream is not held back. Every other message is written immediately,
+    flushing pending tokens first.
+    """
+
+    FLUSH_BYTES = 4096
+    FLUSH_INTERVAL = 0.02
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._buf = bytearray()
+        self._pending_since = 0.0
+
+    def write_token(self, req_id, token: str, flush: bool = False):
+        """Queue a token message, writing it straight away if flush is set."""
+        if not self._buf:
+            self._pending_since = time.monotonic()
+        self._buf += TOKEN_RECORD % (dumps(req_id), dumps(token))
+        if flush or len(self._buf) >= self.FLUSH_BYTES:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flush buffered tokens that have been pending for FLUSH_INTERVAL."""
+        if self._buf and time.monotonic() - self._pending_since >= self.FLUSH_INTERVAL:
+            self.flush()
+
+    def write(self, message: dict):
+        """Write a message immediately."""
+        self._buf += dumps(message)
+        self._buf += b"\n"
+        self.flush()
+
+    def flush(self):
+        """Write out anything buffered."""
+        if self._buf:
+            self._stream.write(self._buf)
+            self._stream.flush()
+            self._buf.clear()
+
+
+class ResultCache:
+    """SQLite-backed LRU cache of generated text.
+
+    Entries are keyed by a hash of everything that determines the output
+    (model, prompt and sampling settings). Once the stored text exceeds
+    max_bytes the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        # Entries are disposable, so a table from before the size column
+        # was added is simply dropped
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(results)")]
+        if columns and "size" not in columns:
+            self._db.execute("DROP TABLE results")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key BLOB PRIMARY KEY, "
+            "text TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "created_at INTEGER NOT NULL, "
+            "accessed_at INTEGER NOT NULL)"
+        )
+        self._db.commit()
+        self._max_bytes = max_bytes
+
+        # Track the stored size in memory so inserts never scan the table
+        (self._total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+
+    @staticmethod
+    def make_key(*parts) -> bytes:
+        """Hash request parameters into a cache key."""
+        return hashlib.blake2b(dumps(list(parts)), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """Return the cached text for key, if any."""
+        row = self._db.execute(
+            "SELECT text FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        self._db.execute(
+            "UPDATE results SET accessed_at = ? WHERE key = ?",
+            (time.time_ns(), key)
+        )
+        self._db.commit()
+        return row[0]
+
+    def put(self, key: bytes, text: str):
+        """Store text under key, evicting old entries past the size cap."""
+        now = time.time_ns()
+        size = len(text.encode("utf-8"))
+        row = self._db.execute(
+            "SELECT size FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._total -= row[0]
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, text, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, text, size, now, now)
+        )
+        self._total += size
+
+        if self._total > self._max_bytes:
+            evict = []
+            for old_key, old_size in self._db.execute(
+                "SELECT key, size FROM results ORDER BY accessed_at"
+            ):
+                if self._total <= self._max_bytes:
+                    break
+                evict.append((old_key,))
+                self._total -= old_size
+            self._db.executemany("DELETE FROM results WHERE key = ?", evict)
+
+        self._db.commit()
+
+
+@dataclass
+class SessionState:
+    """A generate request the daemon is currently decoding."""
+    req_id: Any
+    # Solo sessions: generator of messages from AIDaemon.generate()
+    events: Optional[Iterator[dict]] = None
+    # Batched sessions: sequence id within the shared BatchGenerator
+    batch_key: Optional[tuple] = None
+    uid: Optional[int] = None
+    detokenizer: Any = None
+    # Tokens decoded since the last message, and (solo sessions) their text
+    pending: int = 0
+    buffered: list = field(default_factory=list)
+    # Whether a token message has been sent yet
+    started: bool = False
+    # Where to store the finished text in the result cache
+    cache_key: Optional[bytes] = None
+    output: list = field(default_factory=list)
+
 
 class AIDaemon:
     """Persistent AI inference daemon for OneOnOne."""
@@ -30,8 +265,43 @@ class AIDaemon:
         self.model = None
         self.tokenizer = None
         self.model_path = None
+        self.model_options = None
+        self.draft_model = None
+        self.draft_model_path = None
+        self.num_draft_tokens = NUM_DRAFT_TOKENS
+        self._samplers = {}
         self.running = True
 
+        # KV cache from the previous generation, reused for shared prefixes
+        self._prompt_cache = None
+        self._cache_tokens = []
+
+        # In-flight generate requests, and the shared decode batches that
+        # concurrent requests are multiplexed onto
+        self.active = {}
+        self._batches = {}
+
+        # Lookup tables kept across decode steps so step() does not rebuild
+        # them for every token: solo sessions by req_id, and batched
+        # sessions by BatchGenerator uid
+        self._solo = {}
+        self._batch_sessions = {}
+        self._req_ids = itertools.count(1)
+
+        self.writer = StdoutWriter(sys.stdout.buffer)
+
+        self.result_cache = None
+        if RESULT_CACHE_PATH:
+            try:
+                self.result_cache = ResultCache(
+                    Path(RESULT_CACHE_PATH).expanduser(),
+                    RESULT_CACHE_MAX_BYTES
+                )
+            except (OSError, sqlite3.Error):
+                # Run without the result cache rather than not at all
+                pass
+        self._stdin_buf = bytearray()
+
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._handle_shutdown)
         signal.signal(signal.SIGTERM, self._handle_shutdown)
@@ -39,14 +309,33 @@ class AIDaemon:
     def _handle_shutdown(self, signum, frame):
         """Handle shutdown signals gracefully."""
         self.running = False
-        print(json.dumps({
+        self._send({
             "type": "shutdown",
             "message": "Daemon shutting down"
-        }), flush=True)
+        })
         sys.exit(0)
 
-    def load_model(self, model_path: str) -> dict:
-        """Load model into memory (with caching)."""
+    def load_model(
+        self,
+        model_path: str,
+        quantize: Optional[int] = None,
+        dtype: Optional[str] = None,
+        draft_model_path: Optional[str] = None,
+        num_draft_tokens: int = NUM_DRAFT_TOKENS
+    ) -> dict:
+        """Load model into memory (with caching).
+
+        Args:
+            model_path: Path to an MLX model directory
+            quantize: Quantize weights to this many bits after loading;
+                ignored when the model is already quantized
+            dtype: Cast floating point weights to this dtype (e.g. "float16")
+            draft_model_path: Small model sharing the tokenizer, used to
+                propose tokens for speculative decoding
+            num_draft_tokens: Tokens the draft model proposes per step
+        """
+        self.num_draft_tokens = num_draft_tokens
+
         try:
             model_path = Path(model_path).expanduser()
 
@@ -57,26 +346,69 @@ class AIDaemon:
                     "type": "path_error"
                 }
 
-            # Check if already loaded (CACHE)
-            if self.model is not None and self.model_path == model_path:
+            if quantize is not None and quantize not in QUANTIZE_BITS:
                 return {
-                    "success": True,
-                    "path": str(model_path),
-                    "name": model_path.name,
-                    "cached": True,
-                    "message": "Model already loaded in daemon"
+                    "success": False,
+                    "error": f"Unsupported quantization bits: {quantize}",
+                    "type": "load_error"
                 }
 
-            # Load model
-            self.model, self.tokenizer = load(str(model_path))
-            self.model_path = model_path
+            if dtype is not None and dtype not in MODEL_DTYPES:
+                return {
+                    "success": False,
+                    "error": f"Unsupported dtype: {dtype}",
+                    "type": "load_error"
+                }
+
+            options = (quantize, dtype)
+
+            # Check if already loaded (CACHE)
+            cached = (
+                self.model is not None and self.model_path == model_path
+                and self.model_options == options
+            )
+
+            if not cached:
+                # Load model
+                self.model, self.tokenizer = load(str(model_path))
+                self.model_path = model_path
+                self.model_options = options
+                self.draft_model = None
+                self.draft_model_path = None
+                self._reset_prompt_cache()
+
+                # Cast before quantizing so the scales inherit the new dtype
+                if dtype is not None:
+                    self.model.set_dtype(MODEL_DTYPES[dtype])
+
+                # Decode is memory-bandwidth bound, so fewer bits per weight
+                # translate directly into more tokens per second. Models
+                # converted already quantized are left as they are.
+                if quantize is not None and self._quantized_bits() is None:
+                    nn.quantize(
+                        self.model,
+                        group_size=QUANTIZE_GROUP_SIZE,
+                        bits=quantize,
+                        class_predicate=self._can_quantize
+                    )
+
+                # MLX loads weights lazily; materialize them now so the first
+                # generate request does not pay for it
+                mx.eval(self.model.parameters())
+                self._set_cache_limit()
+                self._warmup()
+
+            self._load_draft_model(draft_model_path, dtype)
 
             return {
                 "success": True,
                 "path": str(model_path),
                 "name": model_path.name,
-                "cached": False,
-                "message": "Model loaded successfully"
+                "bits": self._quantized_bits(),
+                "dtype": dtype,
+                "draft_model_path": str(self.draft_model_path) if self.draft_model_path else None,
+                "cached": cached,
+                "message": "Model already loaded in daemon" if cached else "Model loaded successfully"
             }
 
         except Exception as e:
@@ -86,15 +418,168 @@ class AIDaemon:
                 "type": "load_error"
             }
 
+    def _load_draft_model(self, draft_model_path: Optional[str], dtype: Optional[str]):
+        """Load, replace or drop the draft model used for speculative decoding."""
+        path = Path(draft_model_path).expanduser() if draft_model_path else None
+        if path == self.draft_model_path:
+            return
+
+        # The prompt cache holds the draft model's layers too
+        self.draft_model = None
+        self.draft_model_path = None
+        self._reset_prompt_cache()
+
+        if path is None:
+            return
+
+        if not path.exists():
+            raise FileNotFoundError(f"Draft model path does not exist: {path}")
+
+        draft_model, draft_tokenizer = load(str(path))
+        if draft_tokenizer.vocab_size != self.tokenizer.vocab_size:
+            raise ValueError("Draft model vocabulary does not match the main model")
+
+        if dtype is not None:
+            draft_model.set_dtype(MODEL_DTYPES[dtype])
+        mx.eval(draft_model.parameters())
+
+        self.draft_model = draft_model
+        self.draft_model_path = path
+
+    @staticmethod
+    def _can_quantize(path: str, module) -> bool:
+        """Only quantize layers MLX can quantize with our group size."""
+        return (
+            hasattr(module, "to_quantized")
+            and module.weight.shape[-1] % QUANTIZE_GROUP_SIZE == 0
+        )
+
+    def _quantized_bits(self):
+        """Bits per weight of the loaded model's quantized layers.
+
+        Returns:
+            None for an unquantized model, a sorted list for mixed precision
+        """
+        bits = sorted({
+            module.bits for module in self.model.modules()
+            if getattr(module, "bits", None) is not None
+        })
+        if not bits:
+            return None
+        return bits[0] if len(bits) == 1 else bits
+
+    @staticmethod
+    def _set_cache_limit():
+        """Let MLX's allocator keep enough freed buffers to serve decode."""
+        # Older MLX releases only expose this under mx.metal
+        set_cache_limit = getattr(mx, "set_cache_limit", None) or mx.metal.set_cache_limit
+        set_cache_limit(MLX_CACHE_LIMIT_BYTES)
+
+    def _warmup(self):
+        """Build the Metal kernels for common shapes before first use.
+
+        Each warmup prompt length is prefilled into a throwaway cache and
+        followed by one decode step, then a single-token generation
+        exercises sampling.
+        """
+        for length in WARMUP_PROMPT_LENGTHS:
+            cache = make_prompt_cache(self.model)
+            mx.eval(self.model(mx.zeros((1, length), dtype=mx.uint32), cache=cache))
+            mx.eval(self.model(mx.zeros((1, 1), dtype=mx.uint32), cache=cache))
+
+        for response in stream_generate(
+            self.model,
+            self.tokenizer,
+            prompt="x",
+            max_tokens=1
+        ):
+            mx.eval(response.logprobs)
+            break
+
+    def _reset_prompt_cache(self):
+        """Drop the reusable prompt cache."""
+        self._prompt_cache = None
+        self._cache_tokens = []
+
+    def _make_prompt_cache(self) -> list:
+        """Create an empty prompt cache for the loaded model(s)."""
+        cache = make_prompt_cache(self.model)
+        if self.draft_model is not None:
+            # Speculative decoding expects the draft layers after the main ones
+            cache += make_prompt_cache(self.draft_model)
+        return cache
+
+    def _prepare_prompt_cache(self, prompt_tokens: list) -> int:
+        """Reuse the cached KV entries shared with prompt_tokens.
+
+        Returns:
+            Number of leading prompt tokens already present in the cache
+        """
+        # Always leave at least one token to prefill so there are logits
+        limit = min(len(prompt_tokens) - 1, len(self._cache_tokens))
+        reuse = 0
+        while reuse < limit and prompt_tokens[reuse] == self._cache_tokens[reuse]:
+            reuse += 1
+
+        # Speculative decoding can stop with the draft cache ahead of the
+        # main one; only trim caches that agree on their length
+        if (reuse == 0 or not can_trim_prompt_cache(self._prompt_cache)
+                or len({c.offset for c in self._prompt_cache}) > 1):
+            self._prompt_cache = self._make_prompt_cache()
+            self._cache_tokens = []
+            return 0
+
+        trim_prompt_cache(self._prompt_cache, self._prompt_cache[0].offset - reuse)
+        self._cache_tokens = self._cache_tokens[:reuse]
+        return reuse
+
+    def _update_prompt_cache(self, tokens: list):
+        """Record which tokens the prompt cache now holds."""
+        cached = self._prompt_cache[0].offset
+        if cached > len(tokens) or cached > PROMPT_CACHE_MAX_TOKENS:
+            # Out of sync or too large to keep around
+            self._reset_prompt_cache()
+            return
+        self._cache_tokens = tokens[:cached]
+
+    def _make_sampler(self, temperature: float, top_p: float):
+        """Build (or reuse) the sampler for the given settings.
+
+        mlx_lm already compiles its sampling kernels, so the sampler is used
+        as is.
+        """
+        key = (temperature, top_p)
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            sampler = make_sampler(temp=temperature, top_p=top_p)
+            self._samplers[key] = sampler
+        return sampler
+
+    def _encode_prompt(self, prompt: str) -> list:
+        """Tokenize a prompt the same way mlx_lm.stream_generate does."""
+        bos_token = self.tokenizer.bos_token
+        return self.tokenizer.encode(
+            prompt,
+            add_special_tokens=bos_token is None or not prompt.startswith(bos_token)
+        )
+
     def generate(
         self,
         prompt: str,
         max_tokens: int = 1024,
         temperature: float = 0.7,
         top_p: float = 0.9,
-        repetition_penalty: float = 1.0
+        repetition_penalty: float = 1.0,
+        reuse_cache: bool = True,
+        cache_key: Optional[bytes] = None
     ):
-        """Generate text from prompt (streaming)."""
+        """Generate text from prompt (streaming).
+
+        Args:
+            reuse_cache: Share the daemon's prompt cache. Only one session
+                may do so at a time; others get a private cache.
+            cache_key: Store the finished text in the result cache
+        """
         if self.model is None:
             yield {
                 "type": "error",
@@ -103,25 +588,66 @@ class AIDaemon:
             return
 
         try:
-            # Generate with mlx_lm.generate()
-            response = generate(
+            sampler = self._make_sampler(temperature, top_p)
+            logits_processors = make_logits_processors(
+                repetition_penalty=repetition_penalty if repetition_penalty != 1.0 else None
+            )
+
+            prompt_tokens = self._encode_prompt(prompt)
+
+            # Meeting prompts share long instruction prefixes; only prefill
+            # the part that differs from the previous request
+            if reuse_cache:
+                reuse = self._prepare_prompt_cache(prompt_tokens)
+                prompt_cache = self._prompt_cache
+            else:
+                reuse = 0
+                prompt_cache = self._make_prompt_cache()
+            generated = []
+            output = []
+            interrupted = False
+
+            # The draft model proposes tokens that the main model verifies
+            # in a single forward pass
+            speculative = {}
+            if self.draft_model is not None:
+                speculative = {
+                    "draft_model": self.draft_model,
+                    "num_draft_tokens": self.num_draft_tokens
+                }
+
+            # Yield after every model token so each step() advances this
+            # session as far as a batched one; step() coalesces the text
+            for response in stream_generate(
                 self.model,
                 self.tokenizer,
-                prompt=prompt,
+                prompt=mx.array(prompt_tokens[reuse:]),
                 max_tokens=max_tokens,
-                verbose=False
-            )
+                sampler=sampler,
+                logits_processors=logits_processors,
+                prompt_cache=prompt_cache,
+                **speculative
+            ):
+                generated.append(response.token)
 
-            # Stream tokens from generator
-            for token in response:
                 if not self.running:
+                    interrupted = True
                     break
 
+                # The detokenizer holds back incomplete multi-byte
+                # sequences, so some tokens carry no text yet
+                output.append(response.text)
                 yield {
                     "type": "token",
-                    "token": token
+                    "token": response.text
                 }
 
+            if reuse_cache:
+                self._update_prompt_cache(prompt_tokens + generated)
+
+            if cache_key is not None and not interrupted:
+                self._store_result(cache_key, "".join(output))
+
             # Generation complete
             yield {
                 "type": "complete",
@@ -129,80 +655,374 @@ class AIDaemon:
             }
 
         except Exception as e:
+            # The cache may hold a partial prefill; don't trust it
+            if reuse_cache:
+                self._reset_prompt_cache()
             yield {
                 "type": "error",
                 "error": str(e)
             }
 
+    def _store_result(self, cache_key: bytes, text: str):
+        """Save finished text to the result cache, if it is available."""
+        try:
+            self.result_cache.put(cache_key, text)
+        except sqlite3.Error:
+            pass
+
+    def _replay(self, text: str):
+        """Stream cached text back as if it were being generated."""
+        for start in range(0, len(text), CACHED_CHARS_PER_EVENT):
+            yield {
+                "type": "token",
+                "token": text[start:start + CACHED_CHARS_PER_EVENT]
+            }
+
+        yield {
+            "type": "complete",
+            "message": "Generation finished",
+            "cached": True
+        }
+
+    def start_session(self, command: dict):
+        """Admit a generate request to the set of active sessions."""
+        req_id = command.get("req_id")
+        if req_id is None:
+            req_id = next(self._req_ids)
+
+        if req_id in self.active:
+            self._send({
+                "type": "error",
+                "req_id": req_id,
+                "error": f"Request already in progress: {req_id}"
+            })
+            return
+
+        if self.model is None:
+            self._send({
+                "type": "error",
+                "req_id": req_id,
+                "error": "No model loaded"
+            })
+            return
+
+        prompt = command["prompt"]
+        max_tokens = command.get("max_tokens", 1024)
+        temperature = command.get("temperature", 0.7)
+        top_p = command.get("top_p", 0.9)
+        repetition_penalty = command.get("repetition_penalty", 1.0)
+
+        # Templated insight prompts are often repeated verbatim; answer those
+        # from the result cache. Sampled output is only cached when the
+        # caller asks with "cache": true, so repeats stay random by default.
+        cache_key = None
+        if self.result_cache is not None and command.get("cache", temperature == 0):
+            cache_key = ResultCache.make_key(
+                str(self.model_path),
+                self.model_options,
+                prompt,
+                max_tokens,
+                temperature,
+                top_p,
+                repetition_penalty
+            )
+            try:
+                cached = self.result_cache.get(cache_key)
+            except sqlite3.Error:
+                cached = None
+
+            if cached is not None:
+                self._add_solo(SessionState(
+                    req_id=req_id,
+                    events=self._replay(cached)
+                ))
+                return
+
+        # A lone request takes the single-stream path with prompt cache
+        # reuse. Requests that arrive while others are decoding join a
+        # shared batch so one weight read per step serves all of them.
+        # A session cannot move between paths once started, so the first
+        # request keeps decoding on its own: two concurrent requests run
+        # as two forward passes per step, and only the second and later
+        # ones share a pass. BatchGenerator has no logits processors, so
+        # requests using a repetition penalty are decoded on their own.
+        # Speculative decoding only applies to the single-stream path.
+        if not self.active or BatchGenerator is None or repetition_penalty != 1.0:
+            reuse_cache = not self._solo
+            self._add_solo(SessionState(
+                req_id=req_id,
+                events=self.generate(
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    top_p=top_p,
+                    repetition_penalty=repetition_penalty,
+                    reuse_cache=reuse_cache,
+                    cache_key=cache_key
+                )
+            ))
+            return
+
+        try:
+            # Sequences in one batch share a sampler
+            batch_key = (temperature, top_p)
+            batch = self._batches.get(batch_key)
+            if batch is None:
+                batch = BatchGenerator(
+                    self.model,
+                    stop_tokens=set(self.tokenizer.eos_token_ids),
+                    sampler=self._make_sampler(temperature, top_p)
+                )
+                self._batches[batch_key] = batch
+                self._batch_sessions[batch_key] = {}
+
+            (uid,) = batch.insert([self._encode_prompt(prompt)], max_tokens=max_tokens)
+        except Exception as e:
+            self._send({
+                "type": "error",
+                "req_id": req_id,
+                "error": str(e)
+            })
+            return
+
+        # The tokenizer's detokenizer is shared; give each session its own
+        detokenizer = copy.copy(self.tokenizer.detokenizer)
+        detokenizer.reset()
+
+        session = SessionState(
+            req_id=req_id,
+            batch_key=batch_key,
+            uid=uid,
+            detokenizer=detokenizer,
+            cache_key=cache_key
+        )
+        self.active[req_id] = session
+        self._batch_sessions[batch_key][uid] = session
+
+    def _add_solo(self, session: SessionState):
+        """Track a session that is decoded on its own."""
+        self.active[session.req_id] = session
+        self._solo[session.req_id] = session
+
+    def step(self):
+        """Advance every active session by one decode step."""
+        finished = []
+        for req_id, session in self._solo.items():
+            message = next(session.events, None)
+            if message is not None and message["type"] == "token":
+                session.buffered.append(message["token"])
+                session.pending += 1
+                if session.started and session.pending < TOKENS_PER_EVENT:
+                    continue
+                self._emit(session, "".join(session.buffered))
+                session.buffered.clear()
+                continue
+
+            self._emit(session, "".join(session.buffered))
+            if message is not None:
+                message["req_id"] = req_id
+                self._send(message)
+            finished.append(req_id)
+
+        for req_id in finished:
+            del self._solo[req_id]
+            del self.active[req_id]
+
+        for batch_key, batch in tuple(self._batches.items()):
+            sessions = self._batch_sessions[batch_key]
+
+            try:
+                responses = batch.next()
+            except Exception as e:
+                for session in sessions.values():
+                    del self.active[session.req_id]
+                    self._send({
+                        "type": "error",
+                        "req_id": session.req_id,
+                        "error": str(e)
+                    })
+                sessions.clear()
+                responses = ()
+
+            for response in responses:
+                session = sessions.get(response.uid)
+                if session is None:
+                    continue
+
+                # Stop tokens end the sequence without producing text
+                if response.finish_reason != "stop":
+                    session.detokenizer.add_token(response.token)
+                    session.pending += 1
+                if response.finish_reason is not None:
+                    session.detokenizer.finalize()
+                elif session.started and session.pending < TOKENS_PER_EVENT:
+                    # The detokenizer keeps accumulating until we read it
+                    continue
+
+                text = session.detokenizer.last_segment
+                session.output.append(text)
+                self._emit(session, text)
+
+                if response.finish_reason is not None:
+                    del sessions[response.uid]
+                    del self.active[session.req_id]
+                    if session.cache_key is not None:
+                        self._store_result(session.cache_key, "".join(session.output))
+                    self._send({
+                        "type": "complete",
+                        "req_id": session.req_id,
+                        "message": "Generation finished"
+                    })
+
+            if not sessions:
+                del self._batches[batch_key]
+                del self._batch_sessions[batch_key]
+
+    def _emit(self, session: SessionState, text: str):
+        """Queue a session's decoded text, sending its first text at once."""
+        session.pending = 0
+        if text:
+            self.writer.write_token(session.req_id, text, flush=not session.started)
+            session.started = True
+
+    def _send(self, message: dict):
+        """Write a JSON message to stdout."""
+        self.writer.write(message)
+
+    def handle_command(self, line: bytes):
+        """Parse and dispatch a single command line from stdin."""
+        try:
+            command = loads(line)
+            command_type = command.get("type")
+
+            if command_type == "load_model":
+                if self.active:
+                    self._send({
+                        "success": False,
+                        "error": "Cannot load a model while generating",
+                        "type": "load_error"
+                    })
+                    return
+
+                result = self.load_model(
+                    command["model_path"],
+                    quantize=command.get("quantize"),
+                    dtype=command.get("dtype"),
+                    draft_model_path=command.get("draft_model_path"),
+                    num_draft_tokens=command.get("num_draft_tokens", NUM_DRAFT_TOKENS)
+                )
+                self._send(result)
+
+            elif command_type == "generate":
+                self.start_session(command)
+
+            elif command_type == "status":
+                # Health check
+                self._send({
+                    "type": "status",
+                    "running": True,
+                    "model_loaded": self.model is not None,
+                    "model_path": str(self.model_path) if self.model_path else None,
+                    "draft_model_path": str(self.draft_model_path) if self.draft_model_path else None,
+                    "active_requests": len(self.active)
+                })
+
+            elif command_type == "shutdown":
+                self.running = False
+                self._send({
+                    "type": "shutdown",
+                    "message": "Daemon shutting down"
+                })
+
+            else:
+                self._send({
+                    "type": "error",
+                    "error": f"Unknown command type: {command_type}"
+                })
+
+        except json.JSONDecodeError as e:
+            self._send({
+                "type": "error",
+                "error": f"Invalid JSON: {str(e)}"
+            })
+
+        except Exception as e:
+            self._send({
+                "type": "error",
+                "error": f"Unexpected error: {str(e)}"
+            })
+
+    def _read_stdin(self, fd: int) -> bool:
+        """Read whatever stdin has available and dispatch complete lines.
+
+        Returns:
+            False once stdin has reached EOF
+        """
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return True
+
+        if not data:
+            # EOF; a final command without a trailing newline still counts
+            if self._stdin_buf.strip():
+                self.handle_command(bytes(self._stdin_buf))
+            self._stdin_buf.clear()
+            return False
+
+        self._stdin_buf += data
+        start = 0
+        end = self._stdin_buf.find(b"\n")
+        while end != -1:
+            line = self._stdin_buf[start:end]
+            if line.strip():
+                self.handle_command(line)
+            start = end + 1
+            end = self._stdin_buf.find(b"\n", start)
+        del self._stdin_buf[:start]
+        return True
+
     def run(self):
-        """Main daemon loop - process commands from stdin."""
+        """Main daemon loop - process commands from stdin while decoding."""
         # Send ready message
-        print(json.dumps({
+        self._send({
             "type": "ready",
             "message": "AI Daemon started and ready"
-        }), flush=True)
+        })
 
-        while self.running:
-            try:
-                # Read command from stdin
-                line = sys.stdin.readline()
-
-                if not line:
-                    # EOF reached
-                    break
+        # Read stdin without blocking so commands are picked up between
+        # decode steps instead of stalling them. A terminal shares its file
+        # description with stdout, so leave that blocking; select() already
+        # guarantees os.read() has data to return.
+        stdin = sys.stdin.fileno()
+        blocking = os.get_blocking(stdin)
+        if not os.isatty(stdin):
+            os.set_blocking(stdin, False)
+        selector = selectors.DefaultSelector()
+        selector.register(stdin, selectors.EVENT_READ)
+        stdin_open = True
 
-                command = json.loads(line.strip())
-                command_type = command.get("type")
-
-                if command_type == "load_model":
-                    result = self.load_model(command["model_path"])
-                    print(json.dumps(result), flush=True)
-
-                elif command_type == "generate":
-                    # Stream tokens
-                    for response in self.generate(
-                        prompt=command["prompt"],
-                        max_tokens=command.get("max_tokens", 1024),
-                        temperature=command.get("temperature", 0.7),
-                        top_p=command.get("top_p", 0.9),
-                        repetition_penalty=command.get("repetition_penalty", 1.0)
-                    ):
-                        print(json.dumps(response), flush=True)
-
-                elif command_type == "status":
-                    # Health check
-                    print(json.dumps({
-                        "type": "status",
-                        "running": True,
-                        "model_loaded": self.model is not None,
-                        "model_path": str(self.model_path) if self.model_path else None
-                    }), flush=True)
-
-                elif command_type == "shutdown":
-                    self.running = False
-                    print(json.dumps({
-                        "type": "shutdown",
-                        "message": "Daemon shutting down"
-                    }), flush=True)
+        try:
+            while self.running:
+                if not stdin_open and not self.active:
                     break
 
-                else:
-                    print(json.dumps({
-                        "type": "error",
-                        "error": f"Unknown command type: {command_type}"
-                    }), flush=True)
+                # Only block waiting for commands when nothing is decoding
+                timeout = 0 if self.active else None
+                if timeout is None:
+                    self.writer.flush()
+                if stdin_open and selector.select(timeout):
+                    stdin_open = self._read_stdin(stdin)
 
-            except json.JSONDecodeError as e:
-                print(json.dumps({
-                    "type": "error",
-                    "error": f"Invalid JSON: {str(e)}"
-                }), flush=True)
+                    if not stdin_open:
+                        # EOF reached; finish in-flight requests first
+                        selector.unregister(stdin)
 
-            except Exception as e:
-                print(json.dumps({
-                    "type": "error",
-                    "error": f"Unexpected error: {str(e)}"
-                }), flush=True)
+                if self.active and self.running:
+                    self.step()
+                    self.writer.flush_if_due()
+        finally:
+            os.set_blocking(stdin, blocking)
 
 
 if __name__ == "__main__":
@@ -1,116 +1,736 @@
 #!/usr/bin/env python3
 """
 Whisper Transcription Script for OneOnOne
-Transcribes audio files using OpenAI's Whisper model
+Transcribes audio files using mlx-whisper on Apple Silicon, or OpenAI's
+Whisper model elsewhere
+
+Run with an audio file to transcribe it once, or with --daemon to keep the
+model resident and serve transcription requests from stdin and a local
+socket. One-shot invocations hand their file to a running daemon when one
+is available. With --stream, segments are printed as JSON lines while they
+are decoded, followed by a "complete" line.
 
 Created by Jordan Koch on 2026-02-02.
 Copyright © 2026 Jordan Koch. All rights reserved.
 """
 
 import sys
+import io
+import re
 import json
 import os
+import bisect
+import signal
+import contextlib
+import socket
+import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Unix socket the daemon listens on for one-shot clients
+SOCKET_PATH = Path(
+    os.environ.get("WHISPER_SOCKET", "~/.cache/oneonone/whisper.sock")
+).expanduser()
+
+# Sample rate of decoded audio, fixed by Whisper
+SAMPLE_RATE = 16000
+
+# Voice activity detection; set WHISPER_VAD=0 to transcribe silence too
+VAD_ENABLED = os.environ.get("WHISPER_VAD", "1") != "0"
+VAD_FRAME_SECONDS = 0.5
+# Frames this far above the recording's noise floor count as speech
+VAD_THRESHOLD_DB = 10.0
+VAD_PAD_SECONDS = 0.5
+# Only silences at least this long are cut; shorter pauses stay in context
+VAD_MIN_SILENCE_SECONDS = 3.0
+# Below this fraction of silence, trimming is not worth the seams
+VAD_MIN_SILENCE_FRACTION = 0.1
+
+# Long recordings are split into overlapping chunks transcribed in parallel.
+# The overlap spans a full 30 second Whisper window so every segment near a
+# seam is decoded whole by at least one of the two chunks.
+CHUNK_SECONDS = 300
+CHUNK_OVERLAP_SECONDS = 30
+# Segments ending this close to a chunk's end are likely cut off mid-word
+CHUNK_EDGE_SECONDS = 1.0
+WHISPER_WORKERS = int(os.environ.get("WHISPER_WORKERS", max((os.cpu_count() or 2) // 2, 1)))
 
-def transcribe_audio(audio_path: str) -> dict:
+
+def is_apple_silicon() -> bool:
+    """Whether MLX can run on this machine."""
+    return sys.platform == "darwin" and platform.machine() == "arm64"
+
+
+def mlx_model_repo(model_name: str) -> str:
     """
-    Transcribe an audio file using Whisper.
+    Map a WHISPER_MODEL value to an mlx-community repository.
+
+    "large-v3" becomes mlx-community/whisper-large-v3-mlx, names already
+    starting with "whisper-" (e.g. quantized "whisper-large-v3-mlx-4bit")
+    are taken from mlx-community as-is, and anything containing a slash is
+    used as a full repository or local path.
+    """
+    if "/" in model_name:
+        return model_name
+    if model_name.startswith("whisper-"):
+        return f"mlx-community/{model_name}"
+    return f"mlx-community/whisper-{model_name}-mlx"
+
+
+# Segment lines Whisper prints in verbose mode: "[01:02.500 --> 01:04.000] text"
+SEGMENT_LINE = re.compile(r"^\[([\d:.]+) --> ([\d:.]+)\]\s*(.*)$")
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """Convert a [HH:]MM:SS.mmm timestamp to seconds."""
+    seconds = 0.0
+    for part in timestamp.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class SegmentStream(io.TextIOBase):
+    """
+    Text stream that turns Whisper's verbose output into segment callbacks.
+
+    Neither openai-whisper nor mlx-whisper exposes a per-segment hook, but
+    both print each segment as soon as its window is decoded when verbose.
+    """
+
+    def __init__(self, on_segment):
+        self._on_segment = on_segment
+        self._pending = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._pending += text
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            match = SEGMENT_LINE.match(line)
+            if match:
+                self._on_segment({
+                    "text": match.group(3).strip(),
+                    "start": parse_timestamp(match.group(1)),
+                    "end": parse_timestamp(match.group(2))
+                })
+        return len(text)
 
-    Args:
-        audio_path: Path to the audio file to transcribe
+
+def energy_speech_regions(audio) -> list:
+    """
+    Find non-silent regions by frame RMS energy.
+
+    The threshold is a fixed margin above this recording's noise floor,
+    so a quiet speaker is kept however loud the other one is.
 
     Returns:
-        Dictionary containing transcription results
+        List of (start, end) sample ranges
     """
-    try:
-        import whisper
-    except ImportError:
-        # Fallback: try mlx-whisper if available
+    import numpy as np
+
+    frame = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    count = -(-len(audio) // frame)
+    padded = np.zeros(count * frame, dtype=np.float32)
+    padded[:len(audio)] = audio
+    rms = np.sqrt(np.mean(padded.reshape(count, frame) ** 2, axis=1))
+    floor = np.percentile(rms, 5)
+    threshold = floor * 10 ** (VAD_THRESHOLD_DB / 20)
+
+    regions = []
+    for index in np.flatnonzero(rms > threshold):
+        start, end = int(index) * frame, min((int(index) + 1) * frame, len(audio))
+        if regions and regions[-1][1] == start:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def pad_regions(regions: list, length: int) -> list:
+    """
+    Widen speech regions so word edges survive, merging any separated by
+    less than VAD_MIN_SILENCE_SECONDS.
+    """
+    pad = int(VAD_PAD_SECONDS * SAMPLE_RATE)
+    min_gap = int(VAD_MIN_SILENCE_SECONDS * SAMPLE_RATE)
+    merged = []
+    for start, end in regions:
+        start, end = max(start - pad, 0), min(end + pad, length)
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class SpeechMap:
+    """Maps times in speech-only audio back to the original recording."""
+
+    def __init__(self, regions: list):
+        self._starts = []
+        self._offsets = []
+        position = 0
+        for start, end in regions:
+            self._starts.append(position / SAMPLE_RATE)
+            self._offsets.append((start - position) / SAMPLE_RATE)
+            position += end - start
+
+    def to_original(self, seconds: float, is_end: bool = False) -> float:
+        """
+        Convert a time in the trimmed audio to the original timeline.
+
+        A time exactly on a seam belongs to the following region when it
+        starts a segment and to the preceding one when it ends a segment.
+        """
+        search = bisect.bisect_left if is_end else bisect.bisect_right
+        index = max(search(self._starts, seconds) - 1, 0)
+        return round(seconds + self._offsets[index], 3)
+
+
+def error_result(message: str) -> dict:
+    """Build an empty transcription result carrying an error."""
+    return {
+        "error": message,
+        "text": "",
+        "segments": [],
+        "language": "en"
+    }
+
+
+class WhisperDaemon:
+    """Persistent Whisper transcription daemon for OneOnOne."""
+
+    def __init__(self):
+        self.model = None
+        self.model_name = None
+        self.backend = None
+        self.running = True
+        self._vad_model = None
+
+        # Whisper's verbose output is redirected while transcribing, so keep
+        # hold of the real stdout for protocol messages
+        self._stdout = sys.stdout
+
+        # Transcriptions from stdin and socket clients share one model
+        self._lock = threading.Lock()
+
+    def _handle_shutdown(self, signum, frame):
+        """Handle shutdown signals gracefully."""
+        self.running = False
+        self._send_stdout({
+            "type": "shutdown",
+            "message": "Daemon shutting down"
+        })
+        sys.exit(0)
+
+    def load_model(self, model_name: str):
+        """
+        Load a Whisper model into memory (with caching).
+
+        mlx-whisper runs on the GPU through MLX and is preferred on Apple
+        Silicon; openai-whisper is used elsewhere or when MLX is missing.
+
+        Raises:
+            ImportError: If neither Whisper package is installed
+        """
+        if self.model is not None and self.model_name == model_name:
+            return self.model
+
+        backends = ["mlx", "whisper"] if is_apple_silicon() else ["whisper", "mlx"]
+
+        for backend in backends:
+            if backend == "mlx":
+                try:
+                    import mlx.core as mx
+                    from mlx_whisper.transcribe import ModelHolder
+                except ImportError:
+                    continue
+                # mlx_whisper caches the loaded weights itself, keyed by repo
+                # and dtype; load them now rather than on the first request
+                repo = mlx_model_repo(model_name)
+                ModelHolder.get_model(repo, mx.float16)
+                self.model = repo
+            else:
+                try:
+                    import whisper
+                except ImportError:
+                    continue
+                self.model = whisper.load_model(model_name)
+
+            self.model_name = model_name
+            self.backend = backend
+            return self.model
+
+        raise ImportError(
+            "Whisper not installed. Install with: pip install openai-whisper or pip install mlx-whisper"
+        )
+
+    def load_audio(self, audio_path: str):
+        """
+        Decode an audio file to 16 kHz mono float32 samples.
+
+        Decoding shells out to ffmpeg, so callers keep the result in memory
+        for every pass over the same recording. Nothing is written to disk;
+        recordings stay only where the app stores them.
+        """
+        import numpy as np
+
+        if self.backend == "mlx":
+            from mlx_whisper.audio import load_audio
+        else:
+            from whisper import load_audio
+        return np.asarray(load_audio(audio_path), dtype=np.float32)
+
+    def speech_regions(self, audio) -> list:
+        """
+        Locate speech in decoded audio.
+
+        Uses Silero VAD when the silero-vad package is installed, otherwise
+        a frame energy gate.
+
+        Returns:
+            List of (start, end) sample ranges
+        """
         try:
-            from mlx_whisper import transcribe
-            result = transcribe(audio_path)
-            return {
-                "text": result.get("text", ""),
-                "segments": result.get("segments", []),
-                "language": result.get("language", "en")
-            }
+            from silero_vad import load_silero_vad, get_speech_timestamps
         except ImportError:
+            return pad_regions(energy_speech_regions(audio), len(audio))
+
+        if self._vad_model is None:
+            self._vad_model = load_silero_vad()
+
+        timestamps = get_speech_timestamps(audio, self._vad_model, sampling_rate=SAMPLE_RATE)
+        regions = [(ts["start"], ts["end"]) for ts in timestamps]
+        return pad_regions(regions, len(audio))
+
+    def transcribe(self, audio_path: str, on_segment=None) -> dict:
+        """
+        Transcribe an audio file using Whisper.
+
+        Args:
+            audio_path: Path to the audio file to transcribe
+            on_segment: Called with each segment's text, start and end as
+                soon as it is decoded
+
+        Returns:
+            Dictionary containing transcription results
+        """
+        # Load the model (use base for speed, or large-v3 for accuracy)
+        model_name = os.environ.get("WHISPER_MODEL", "base")
+
+        try:
+            model = self.load_model(model_name)
+        except ImportError as e:
+            return error_result(str(e))
+        except Exception as e:
+            return error_result(f"Failed to load Whisper model: {str(e)}")
+
+        # Transcribe
+        try:
+            audio = self.load_audio(audio_path)
+
+            # Whisper decodes every 30 second window, silent or not; only
+            # hand it the speech and map timestamps back afterwards
+            speech_map = None
+            if VAD_ENABLED:
+                import numpy as np
+
+                # Finding no speech at all more likely means the detector
+                # misjudged the recording, so let Whisper hear everything
+                regions = self.speech_regions(audio)
+                speech = sum(end - start for start, end in regions)
+                if regions and speech < len(audio) * (1 - VAD_MIN_SILENCE_FRACTION):
+                    audio = np.concatenate([audio[start:end] for start, end in regions])
+                    speech_map = SpeechMap(regions)
+
+            def to_original(seconds: float, is_end: bool = False) -> float:
+                return speech_map.to_original(seconds, is_end) if speech_map else seconds
+
+            # Half precision halves the memory traffic of every decode step.
+            # PyTorch has no fp16 kernels on CPU, so only ask for it off-CPU.
+            fp16 = self.backend == "mlx" or model.device.type != "cpu"
+            emitted = []
+
+            def on_decoded(segment: dict):
+                segment["start"] = to_original(segment["start"])
+                segment["end"] = to_original(segment["end"], is_end=True)
+                emitted.append(segment)
+                on_segment(segment)
+
+            def decode(fp16: bool) -> dict:
+                segment_hook = on_decoded if on_segment is not None else None
+                # openai-whisper hooks its KV cache into the shared model,
+                # so only mlx-whisper can decode chunks concurrently
+                if (self.backend == "mlx" and WHISPER_WORKERS > 1
+                        and len(audio) > CHUNK_SECONDS * SAMPLE_RATE):
+                    return self._transcribe_chunks(model, audio, fp16, segment_hook)
+                return self._run_backend(model, audio, fp16, segment_hook)
+
+            try:
+                result = decode(fp16)
+            except Exception:
+                # Retry in fp32 on devices without usable half support,
+                # unless segments already went out to the client
+                if not fp16 or emitted:
+                    raise
+                result = decode(False)
+
+            # Format segments
+            segments = []
+            for segment in result.get("segments", []):
+                segments.append({
+                    "text": segment.get("text", "").strip(),
+                    "start": to_original(segment.get("start", 0)),
+                    "end": to_original(segment.get("end", 0), is_end=True),
+                    "confidence": segment.get("no_speech_prob", 0)
+                })
+
             return {
-                "error": "Whisper not installed. Install with: pip install openai-whisper or pip install mlx-whisper",
-                "text": "",
-                "segments": [],
-                "language": "en"
+                "text": result.get("text", "").strip(),
+                "segments": segments,
+                "language": result.get("language", "en")
             }
 
-    # Load the model (use base for speed, or large-v3 for accuracy)
-    model_name = os.environ.get("WHISPER_MODEL", "base")
+        except Exception as e:
+            return error_result(f"Transcription failed: {str(e)}")
 
-    try:
-        model = whisper.load_model(model_name)
-    except Exception as e:
-        return {
-            "error": f"Failed to load Whisper model: {str(e)}",
-            "text": "",
-            "segments": [],
-            "language": "en"
-        }
+    def _transcribe_chunks(self, model, audio, fp16: bool, on_segment=None) -> dict:
+        """
+        Transcribe long audio as overlapping chunks decoded concurrently.
 
-    # Transcribe
-    try:
-        result = model.transcribe(
-            audio_path,
-            language=None,  # Auto-detect language
-            task="transcribe",
-            verbose=False
-        )
+        Each chunk contributes segments up to the middle of the following
+        overlap, stopping early at any segment that runs into the chunk's
+        truncated end. The next chunk then picks up from the end of the last
+        segment kept, skipping segments mostly covered by it. Segments are
+        reported in order as soon as every earlier chunk has finished.
+        """
+        size = CHUNK_SECONDS * SAMPLE_RATE
+        overlap = CHUNK_OVERLAP_SECONDS * SAMPLE_RATE
+        starts = list(range(0, len(audio) - overlap, size - overlap))
+        cuts = [(start + overlap / 2) / SAMPLE_RATE for start in starts[1:]]
+        cuts.append(float("inf"))
+        tails = [(start + size) / SAMPLE_RATE - CHUNK_EDGE_SECONDS for start in starts[:-1]]
+        tails.append(float("inf"))
+
+        import mlx.core as mx
+        from mlx_whisper.transcribe import ModelHolder
+
+        # Load the weights in the requested precision once, up front, so
+        # the workers share them instead of racing to load their own
+        ModelHolder.get_model(model, mx.float16 if fp16 else mx.float32)
+
+        def decode(start: int) -> dict:
+            # MLX does not promise that threads can evaluate on one stream
+            # at the same time, so each chunk gets a GPU stream of its own
+            with mx.stream(mx.new_stream(mx.gpu)):
+                return self._run_backend(model, audio[start:start + size], fp16)
 
-        # Format segments
         segments = []
-        for segment in result.get("segments", []):
-            segments.append({
-                "text": segment.get("text", "").strip(),
-                "start": segment.get("start", 0),
-                "end": segment.get("end", 0),
-                "confidence": segment.get("no_speech_prob", 0)
-            })
+        language = None
+
+        with ThreadPoolExecutor(max_workers=min(WHISPER_WORKERS, len(starts))) as pool:
+            futures = [pool.submit(decode, start) for start in starts]
+            results = (future.result() for future in futures)
+
+            stitched = 0.0
+            for start, cut, tail, result in zip(starts, cuts, tails, results):
+                offset = start / SAMPLE_RATE
+                language = language or result.get("language")
+
+                for segment in result.get("segments", []):
+                    begin = segment.get("start", 0) + offset
+                    end = segment.get("end", 0) + offset
+                    if (begin + end) / 2 <= stitched:
+                        # Already covered by the previous chunk
+                        continue
+                    if begin >= cut or end >= tail:
+                        # Left for the next chunk, which hears all of it
+                        break
+
+                    text = segment.get("text", "").strip()
+                    segments.append({
+                        "text": text,
+                        "start": begin,
+                        "end": end,
+                        "no_speech_prob": segment.get("no_speech_prob", 0)
+                    })
+                    stitched = end
+                    if on_segment is not None:
+                        on_segment({
+                            "text": text,
+                            "start": begin,
+                            "end": end
+                        })
 
         return {
-            "text": result.get("text", "").strip(),
+            "text": " ".join(segment["text"] for segment in segments),
             "segments": segments,
-            "language": result.get("language", "en")
+            "language": language or "en"
         }
 
-    except Exception as e:
-        return {
-            "error": f"Transcription failed: {str(e)}",
-            "text": "",
-            "segments": [],
-            "language": "en"
-        }
+    def _run_backend(self, model, audio, fp16: bool, on_segment=None) -> dict:
+        """Run the loaded backend's transcribe() on decoded audio."""
+        # Verbose mode prints segments as they are decoded; capture them
+        if on_segment is not None:
+            output = contextlib.redirect_stdout(SegmentStream(on_segment))
+        else:
+            output = contextlib.nullcontext()
+
+        with output:
+            if self.backend == "mlx":
+                import mlx_whisper
+                return mlx_whisper.transcribe(
+                    audio,
+                    path_or_hf_repo=model,
+                    language=None,  # Auto-detect language
+                    task="transcribe",
+                    fp16=fp16,
+                    verbose=on_segment is not None
+                )
+
+            return model.transcribe(
+                audio,
+                language=None,  # Auto-detect language
+                task="transcribe",
+                fp16=fp16,
+                verbose=on_segment is not None
+            )
+
+    def handle_command(self, command: dict, send):
+        """Process one command, writing responses through send()."""
+        command_type = command.get("type")
+
+        if command_type == "transcribe":
+            audio_path = command.get("path", "")
+            if not os.path.exists(audio_path):
+                result = error_result(f"File not found: {audio_path}")
+            else:
+                with self._lock:
+                    result = self.transcribe(
+                        audio_path,
+                        on_segment=lambda segment: send({"type": "segment", **segment})
+                    )
+            send({"type": "complete", **result})
+
+        elif command_type == "status":
+            # Health check
+            send({
+                "type": "status",
+                "running": True,
+                "model_loaded": self.model is not None,
+                "model_name": self.model_name,
+                "backend": self.backend
+            })
+
+        elif command_type == "shutdown":
+            self.running = False
+            send({
+                "type": "shutdown",
+                "message": "Daemon shutting down"
+            })
+            if threading.current_thread() is not threading.main_thread():
+                # The main thread is blocked reading stdin; interrupt it so
+                # the daemon exits and removes its socket
+                signal.pthread_kill(threading.main_thread().ident, signal.SIGTERM)
+
+        else:
+            send({
+                "type": "error",
+                "error": f"Unknown command type: {command_type}"
+            })
+
+    def _send_stdout(self, message: dict):
+        """Write a JSON message to stdout."""
+        print(json.dumps(message), file=self._stdout, flush=True)
+
+    def _serve_socket(self, server: socket.socket):
+        """Accept one-shot clients on the Unix socket, each on its own thread."""
+        while self.running:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                break
+
+            # Transcriptions serialize on self._lock, so status probes are
+            # still answered while one is running
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn: socket.socket):
+        """Answer a single command from a socket client."""
+        with conn:
+            def send(message: dict):
+                conn.sendall(json.dumps(message).encode() + b"\n")
+
+            try:
+                line = conn.makefile("rb").readline()
+                self.handle_command(json.loads(line), send)
+            except json.JSONDecodeError as e:
+                send({"type": "error", "error": f"Invalid JSON: {str(e)}"})
+            except OSError:
+                # Client went away
+                pass
+            except Exception as e:
+                send({"type": "error", "error": f"Unexpected error: {str(e)}"})
+
+    def _bind_socket(self):
+        """Listen on SOCKET_PATH unless another daemon already does."""
+        if request_daemon({"type": "status"}) is not None:
+            return None
+
+        SOCKET_PATH.parent.mkdir(parents=True, exist_ok=True)
+        if SOCKET_PATH.exists():
+            # Left behind by a daemon that did not shut down cleanly
+            SOCKET_PATH.unlink()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(SOCKET_PATH))
+        os.chmod(SOCKET_PATH, 0o600)
+        server.listen()
+        return server
+
+    def run(self):
+        """Main daemon loop - process commands from stdin."""
+        # Setup signal handlers for graceful shutdown
+        signal.signal(signal.SIGINT, self._handle_shutdown)
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+
+        try:
+            server = self._bind_socket()
+        except OSError:
+            server = None
+
+        if server is not None:
+            threading.Thread(target=self._serve_socket, args=(server,), daemon=True).start()
+
+        # Have the model resident before announcing readiness; socket
+        # clients arriving meanwhile wait on the lock. Load errors are
+        # reported again by the first transcription.
+        with self._lock:
+            try:
+                self.load_model(os.environ.get("WHISPER_MODEL", "base"))
+            except Exception:
+                pass
+
+        # Send ready message
+        self._send_stdout({
+            "type": "ready",
+            "message": "Whisper daemon started and ready"
+        })
+
+        try:
+            while self.running:
+                line = sys.stdin.readline()
+
+                if not line:
+                    # EOF reached
+                    break
+
+                try:
+                    self.handle_command(json.loads(line.strip()), self._send_stdout)
+                except json.JSONDecodeError as e:
+                    self._send_stdout({
+                        "type": "error",
+                        "error": f"Invalid JSON: {str(e)}"
+                    })
+                except Exception as e:
+                    self._send_stdout({
+                        "type": "error",
+                        "error": f"Unexpected error: {str(e)}"
+                    })
+        finally:
+            if server is not None:
+                server.close()
+                SOCKET_PATH.unlink(missing_ok=True)
+
+
+def request_daemon(command: dict, on_message=None):
+    """
+    Send a command to a running daemon over its socket.
+
+    Args:
+        command: Command to send
+        on_message: Called with each message before the final one
+
+    Returns:
+        The daemon's final response, or None if no daemon is listening
+    """
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(str(SOCKET_PATH))
+    except OSError:
+        return None
+
+    with client:
+        try:
+            client.sendall(json.dumps(command).encode() + b"\n")
+            response = None
+            for line in client.makefile("rb"):
+                if response is not None and on_message is not None:
+                    on_message(response)
+                response = json.loads(line)
+            return response
+        except (OSError, ValueError):
+            # Daemon died mid-request
+            return None
+
+
+def transcribe_audio(audio_path: str, on_segment=None) -> dict:
+    """
+    Transcribe an audio file using Whisper.
+
+    Uses a running daemon when available, otherwise loads the model in
+    this process.
+    """
+    def on_message(message: dict):
+        if on_segment is not None and message.pop("type", None) == "segment":
+            on_segment(message)
+
+    response = request_daemon(
+        {"type": "transcribe", "path": os.path.abspath(audio_path)},
+        on_message=on_message
+    )
+    if response is not None:
+        response.pop("type", None)
+        return response
+
+    return WhisperDaemon().transcribe(audio_path, on_segment=on_segment)
 
 
 def main():
-    if len(sys.argv) < 2:
-        print(json.dumps({
-            "error": "Usage: whisper_transcribe.py <audio_file>",
-            "text": "",
-            "segments": [],
-            "language": "en"
-        }))
+    args = sys.argv[1:]
+    stream = "--stream" in args
+    if stream:
+        args.remove("--stream")
+
+    if not args:
+        print(json.dumps(error_result("Usage: whisper_transcribe.py [--stream] <audio_file> | --daemon")))
         sys.exit(1)
 
-    audio_path = sys.argv[1]
+    if args[0] == "--daemon":
+        WhisperDaemon().run()
+        return
+
+    audio_path = args[0]
 
     if not os.path.exists(audio_path):
-        print(json.dumps({
-            "error": f"File not found: {audio_path}",
-            "text": "",
-            "segments": [],
-            "language": "en"
-        }))
+        print(json.dumps(error_result(f"File not found: {audio_path}")))
         sys.exit(1)
 
-    result = transcribe_audio(audio_path)
-    print(json.dumps(result))
+    if not stream:
+        result = transcribe_audio(audio_path)
+        print(json.dumps(result))
+        return
+
+    stdout = sys.stdout
+
+    def on_segment(segment: dict):
+        print(json.dumps({"type": "segment", **segment}), file=stdout, flush=True)
+
+    result = transcribe_audio(audio_path, on_segment=on_segment)
+    print(json.dumps({"type": "complete", **result}), flush=True)
 
 
 if __name__ == "__main__":